@@ -1,149 +1,535 @@
+import asyncio
+import functools
+import mmap
 import os
 import json
+import random
+import socket
+import struct
+import threading
 import time
-import msvcrt
 import logging # Import logging
-from typing import Dict, Any, Optional
+from collections import deque
+from typing import Dict, Any, Deque, Optional
+
+# Prefer orjson for (de)serialization: it is several times faster than the
+# stdlib and returns bytes directly, which is what the socket path sends.
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+    _HAS_ORJSON = True
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+    _loads = json.loads
+    _HAS_ORJSON = False
+
+# Below this size a plain read() is cheaper than setting up a mapping
+_MMAP_THRESHOLD = 4096
+
+def _backoff_delay(attempt: int) -> float:
+    """
+    Exponential backoff with jitter for send retries.
+
+    Starts at ~1 ms so a brief race resolves quickly, doubles up to a
+    50 ms cap, and adds up to 2 ms of jitter so concurrent senders do
+    not wake in lockstep and stampede the receiver.
+    """
+    return min(0.001 * (1 << min(attempt, 6)), 0.05) + random.random() * 0.002
+
+# AF_UNIX is available on POSIX (and recent Windows builds expose it too).
+# When it is missing we fall back to the original file+lock protocol.
+_HAS_UNIX_SOCKETS = hasattr(socket, 'AF_UNIX')
 
 class IPCManager:
     """
     Inter-Process Communication Manager for Roo Code Instances
-    Uses file-based communication with Windows file locking
+    Prefers a per-channel UNIX domain socket (length-prefixed JSON frames,
+    no polling); falls back to file-based communication with atomic
+    rename publication where AF_UNIX is unavailable.
     """
     def __init__(self, base_dir: str = None):
         """
         Initialize IPC Manager
-        
+
         :param base_dir: Base directory for IPC files
         """
         # Use a platform-specific default if not provided
         if base_dir is None:
             base_dir = os.path.join(
-                os.getenv('TEMP', os.path.join(os.path.expanduser('~'), 'AppData', 'Local', 'Temp')), 
+                os.getenv('TEMP', os.path.join(os.path.expanduser('~'), 'AppData', 'Local', 'Temp')),
                 'roocode_ipc'
             )
-        
+
         self.base_dir = base_dir
-        os.makedirs(base_dir, exist_ok=True)
-        logging.info(f"[IPCManager] Initialized with Base Dir: {self.base_dir}") # Use logging
-    
-    def _get_lock_path(self, instance_name: str) -> str:
+        # Created lazily on first use so instantiating a controller costs
+        # no syscalls (see _ensure_base_dir)
+        self._base_dir_ready = False
+        # Listening sockets owned by this process, keyed by instance name
+        self._servers: Dict[str, socket.socket] = {}
+        # Memoized (lock, message, socket) paths per instance name; these
+        # are rebuilt on every send/receive otherwise, which is pure
+        # allocation overhead on the hot path.
+        self._path_cache: Dict[str, tuple] = {}
+        # Frames already read off a connection but not yet consumed
+        self._inbox: Dict[str, Deque[Dict[str, Any]]] = {}
+        # Async batching writer state (see queue_message / _drain)
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._writer_tasks: Dict[str, asyncio.Task] = {}
+
+    def _ensure_base_dir(self):
+        """ Create the base directory on first actual use """
+        if not self._base_dir_ready:
+            os.makedirs(self.base_dir, exist_ok=True)
+            self._base_dir_ready = True
+            logging.info(f"[IPCManager] Initialized with Base Dir: {self.base_dir}") # Use logging
+
+    def _paths(self, instance_name: str) -> tuple:
         """
-        Get the lock file path for a specific instance
-        
+        Get the (lock, message, socket) file paths for a specific instance,
+        computing and caching them on first use.
+
         :param instance_name: Name of the Roo code instance
-        :return: Path to the lock file
+        :return: Tuple of (lock_path, message_path, socket_path)
         """
-        return os.path.join(self.base_dir, f"{instance_name}.lock")
-    
-    def _get_message_path(self, instance_name: str) -> str:
+        paths = self._path_cache.get(instance_name)
+        if paths is None:
+            paths = self._path_cache[instance_name] = (
+                os.path.join(self.base_dir, instance_name + '.lock'),
+                os.path.join(self.base_dir, instance_name + '_message.json'),
+                os.path.join(self.base_dir, instance_name + '.sock'),
+            )
+        return paths
+
+    def _get_socket_path(self, instance_name: str) -> str:
         """
-        Get the message file path for a specific instance
-        
+        Get the UNIX socket path for a specific instance
+
         :param instance_name: Name of the Roo code instance
-        :return: Path to the message file
+        :return: Path to the socket file
         """
-        return os.path.join(self.base_dir, f"{instance_name}_message.json")
-    
-    def send_message(self, 
-                     instance_name: str, 
-                     message: Dict[str, Any], 
+        return self._paths(instance_name)[2]
+
+    def _server_for(self, instance_name: str) -> socket.socket:
+        """
+        Lazily create (or return) the listening socket for a channel.
+        The receiving side owns the socket; senders connect to it.
+
+        :param instance_name: Name of the Roo code instance
+        :return: Listening socket bound to the channel's path
+        """
+        server = self._servers.get(instance_name)
+        if server is None:
+            self._ensure_base_dir()
+            socket_path = self._get_socket_path(instance_name)
+            # Remove a stale socket file left behind by a dead receiver
+            try:
+                os.unlink(socket_path)
+            except FileNotFoundError:
+                pass
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server.bind(socket_path)
+            server.listen()
+            self._servers[instance_name] = server
+        return server
+
+    @staticmethod
+    def _recv_exact(conn: socket.socket, n: int) -> Optional[bytes]:
+        """ Read exactly n bytes from a connection, or None on EOF """
+        chunks = []
+        while n > 0:
+            chunk = conn.recv(n)
+            if not chunk:
+                return None
+            chunks.append(chunk)
+            n -= len(chunk)
+        return b''.join(chunks)
+
+    @staticmethod
+    def _envelope_bytes(payload_buf: bytes) -> bytes:
+        """
+        Build the message envelope around already-encoded payload bytes.
+
+        Splicing the payload in at the byte level lets callers that
+        pre-serialize their payloads skip a decode/re-encode round trip.
+        """
+        return (b'{"timestamp":' + repr(time.time()).encode()
+                + b',"payload":' + payload_buf + b'}')
+
+    def send_message(self,
+                     instance_name: str,
+                     message: Dict[str, Any],
                      timeout: int = 10) -> bool:
         """
         Send a message to a specific Roo code instance
-        
+
         :param instance_name: Target instance name
         :param message: Message to send
-        :param timeout: Timeout for acquiring lock
+        :param timeout: Timeout for connecting / acquiring lock
         :return: Whether message was sent successfully
         """
-        lock_path = self._get_lock_path(instance_name)
-        message_path = self._get_message_path(instance_name)
-        
+        return self.send_message_bytes(instance_name, _dumps(message), timeout)
+
+    def send_message_bytes(self,
+                           instance_name: str,
+                           payload_buf: bytes,
+                           timeout: int = 10) -> bool:
+        """
+        Send an already-encoded JSON payload to a specific Roo code instance
+
+        :param instance_name: Target instance name
+        :param payload_buf: JSON-encoded payload bytes
+        :param timeout: Timeout for connecting
+        :return: Whether message was sent successfully
+        """
+        buf = self._envelope_bytes(payload_buf)
+        if not _HAS_UNIX_SOCKETS:
+            return self._send_file_bytes(instance_name, buf, timeout)
+
+        socket_path = self._get_socket_path(instance_name)
+        frame = struct.pack('>I', len(buf)) + buf
+
+        attempt = 0
         start_time = time.time()
         while time.time() - start_time < timeout:
             try:
-                # Open lock file with exclusive access
-                with open(lock_path, 'w') as lock_file:
-                    # Try to acquire an exclusive lock
-                    try:
-                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
-                        
-                        # Write the message
-                        with open(message_path, 'w') as msg_file:
-                            json.dump({
-                                'timestamp': time.time(),
-                                'payload': message
-                            }, msg_file)
-                        
-                        # Release the lock
-                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
-                        
-                        return True
-                    except IOError:
-                        # Could not acquire lock
-                        time.sleep(0.1)
-                        continue
-            except Exception:
-                time.sleep(0.1)
-        
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.settimeout(timeout)
+                    sock.connect(socket_path)
+                    sock.sendall(frame)
+                    return True
+            except (ConnectionRefusedError, FileNotFoundError, OSError):
+                # No receiver listening yet; retry until timeout
+                attempt += 1
+                time.sleep(_backoff_delay(attempt))
+
+        return False
+
+    async def asend_message(self,
+                            instance_name: str,
+                            message: Dict[str, Any],
+                            timeout: int = 10) -> bool:
+        """
+        Async variant of send_message for callers on the event loop.
+
+        Uses a non-blocking socket with loop.sock_connect/sock_sendall so a
+        slow or absent receiver never stalls other coroutines, unlike the
+        synchronous send_message which can sleep for up to `timeout`.
+
+        :param instance_name: Target instance name
+        :param message: Message to send
+        :param timeout: Timeout for connecting
+        :return: Whether message was sent successfully
+        """
+        if not _HAS_UNIX_SOCKETS:
+            return await asyncio.to_thread(
+                self.send_message, instance_name, message, timeout
+            )
+
+        loop = asyncio.get_running_loop()
+        socket_path = self._get_socket_path(instance_name)
+        buf = self._envelope_bytes(_dumps(message))
+        frame = struct.pack('>I', len(buf)) + buf
+
+        attempt = 0
+        deadline = loop.time() + timeout
+        while loop.time() < deadline:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            try:
+                await loop.sock_connect(sock, socket_path)
+                await loop.sock_sendall(sock, frame)
+                return True
+            except (ConnectionRefusedError, FileNotFoundError, OSError):
+                # No receiver listening yet; retry until timeout
+                attempt += 1
+                await asyncio.sleep(_backoff_delay(attempt))
+            finally:
+                sock.close()
+
         return False
-    
-    def receive_message(self, 
-                        instance_name: str, 
+
+    async def queue_message(self, instance_name: str, message: Dict[str, Any]):
+        """
+        Queue a message for batched delivery and return immediately.
+
+        Messages queued back-to-back for the same channel are coalesced by a
+        single background writer task into one framed batch and written with
+        one sendall, instead of paying a connect/write cycle per message.
+
+        :param instance_name: Target instance name
+        :param message: Message to send (dict, or pre-encoded payload bytes)
+        """
+        queue = self._queues.get(instance_name)
+        if queue is None:
+            queue = self._queues[instance_name] = asyncio.Queue()
+            self._writer_tasks[instance_name] = asyncio.create_task(
+                self._drain(instance_name)
+            )
+        await queue.put(message)
+
+    async def _drain(self, instance_name: str):
+        """ Background writer: coalesce queued messages into batched writes """
+        queue = self._queues[instance_name]
+        while True:
+            messages = [await queue.get()]
+            # Grab whatever else is already queued, up to a batch cap
+            for _ in range(min(queue.qsize(), 63)):
+                messages.append(queue.get_nowait())
+            try:
+                await asyncio.to_thread(self._send_batch, instance_name, messages)
+            except Exception:
+                logging.exception(
+                    f"[IPCManager] Batched send failed for '{instance_name}'"
+                )
+            for _ in messages:
+                queue.task_done()
+
+    def _send_batch(self, instance_name: str, messages: list, timeout: int = 10):
+        """ Write a list of messages as one framed batch over one connection """
+        envelopes = [
+            self._envelope_bytes(m if isinstance(m, bytes) else _dumps(m))
+            for m in messages
+        ]
+
+        if not _HAS_UNIX_SOCKETS:
+            dropped = sum(
+                0 if self._send_file_bytes(instance_name, buf, timeout) else 1
+                for buf in envelopes
+            )
+            if dropped:
+                raise TimeoutError(
+                    f"No receiver for '{instance_name}' within {timeout}s; "
+                    f"dropped {dropped} of {len(envelopes)} batched message(s)"
+                )
+            return
+
+        frames = []
+        for buf in envelopes:
+            frames.append(struct.pack('>I', len(buf)) + buf)
+
+        socket_path = self._get_socket_path(instance_name)
+        attempt = 0
+        start_time = time.time()
+        while time.time() - start_time < timeout:
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.settimeout(timeout)
+                    sock.connect(socket_path)
+                    # Scatter-gather write: the kernel walks the frame list
+                    # in one syscall, with no user-space join/copy first.
+                    sent = sock.sendmsg(frames)
+                    total = sum(len(f) for f in frames)
+                    if sent < total:
+                        # Rare short write: push the remainder the plain way
+                        sock.sendall(b''.join(frames)[sent:])
+                    return
+            except (ConnectionRefusedError, FileNotFoundError, OSError):
+                attempt += 1
+                time.sleep(_backoff_delay(attempt))
+
+        # Raise so _drain's exception guard reports the loss; returning
+        # quietly here would discard the whole batch with no trace.
+        raise TimeoutError(
+            f"No receiver for '{instance_name}' within {timeout}s; "
+            f"dropped {len(frames)} batched message(s)"
+        )
+
+    def receive_message(self,
+                        instance_name: str,
                         timeout: int = 10,
                         remove_after_read: bool = True) -> Optional[Dict[str, Any]]:
         """
         Receive a message for a specific Roo code instance
-        
+
         :param instance_name: Source instance name
-        :param timeout: Timeout for acquiring lock
+        :param timeout: How long to block waiting for a message
         :param remove_after_read: Whether to delete the message after reading
+            (only meaningful for the file-based fallback)
         :return: Received message or None
         """
-        lock_path = self._get_lock_path(instance_name)
-        message_path = self._get_message_path(instance_name)
-        
+        if not _HAS_UNIX_SOCKETS:
+            return self._receive_message_file(instance_name, timeout, remove_after_read)
+
+        # Serve buffered frames from an earlier batched connection first
+        inbox = self._inbox.setdefault(instance_name, deque())
+        if inbox:
+            return inbox.popleft()
+
+        server = self._server_for(instance_name)
+        server.settimeout(timeout)
+        try:
+            conn, _ = server.accept()
+        except socket.timeout:
+            return None
+
+        # Read every frame on the connection (senders may batch several
+        # messages per connection); surplus frames are kept for later calls.
+        with conn:
+            while True:
+                header = self._recv_exact(conn, 4)
+                if header is None:
+                    break
+                (length,) = struct.unpack('>I', header)
+                buf = self._recv_exact(conn, length)
+                if buf is None:
+                    break
+                inbox.append(_loads(buf)['payload'])
+
+        if inbox:
+            return inbox.popleft()
+        return None
+
+    def receive_blocking(self, instance_name: str) -> Dict[str, Any]:
+        """
+        Block until a message arrives for a specific Roo code instance.
+
+        Unlike receive_message there is no timeout: the calling thread sleeps
+        in the kernel until a sender connects, so idle channels cost no CPU.
+
+        :param instance_name: Source instance name
+        :return: Received message
+        """
+        while True:
+            # timeout=None makes accept() (or the file fallback's poll
+            # window) wait indefinitely; loop in case a sender connects
+            # and disconnects without delivering a complete frame.
+            message = self.receive_message(instance_name, timeout=None)
+            if message is not None:
+                return message
+
+    def subscribe(self, instance_name: str, callback, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """
+        Invoke callback(payload) for every message arriving on a channel.
+
+        A daemon listener thread blocks in receive_blocking; when an event
+        loop is supplied the callback is scheduled on it thread-safely, so
+        async code can await events instead of polling the channel.
+
+        :param instance_name: Source instance name
+        :param callback: Called with each received payload
+        :param loop: Event loop to dispatch the callback on, if any
+        """
+        def _listen():
+            while True:
+                try:
+                    payload = self.receive_blocking(instance_name)
+                except OSError:
+                    # Listening socket closed (e.g. via close()); stop.
+                    break
+                if loop is not None:
+                    loop.call_soon_threadsafe(callback, payload)
+                else:
+                    callback(payload)
+
+        thread = threading.Thread(
+            target=_listen,
+            name=f"ipc-subscriber-{instance_name}",
+            daemon=True
+        )
+        thread.start()
+        return thread
+
+    def close(self):
+        """ Close any listening sockets and remove their socket files """
+        for task in self._writer_tasks.values():
+            task.cancel()
+        self._writer_tasks.clear()
+        self._queues.clear()
+        for instance_name, server in self._servers.items():
+            server.close()
+            try:
+                os.unlink(self._get_socket_path(instance_name))
+            except FileNotFoundError:
+                pass
+        self._servers.clear()
+
+    # --- Legacy file-based fallback (hosts without AF_UNIX) ---
+
+    def _send_file_bytes(self,
+                         instance_name: str,
+                         envelope_buf: bytes,
+                         timeout: int = 10) -> bool:
+        """ File variant of send: write-to-temp + atomic rename """
+        self._ensure_base_dir()
+        _, message_path, _ = self._paths(instance_name)
+        tmp_path = f"{message_path}.tmp.{os.getpid()}"
+
+        try:
+            with open(tmp_path, 'wb') as msg_file:
+                msg_file.write(envelope_buf)
+            # os.replace is atomic on both POSIX and Windows, so readers
+            # only ever see a complete message; no lock file needed.
+            os.replace(tmp_path, message_path)
+            return True
+        except Exception:
+            logging.exception(
+                f"[IPCManager] File-based send failed for '{instance_name}'"
+            )
+            return False
+
+    def _receive_message_file(self,
+                              instance_name: str,
+                              timeout: int = 10,
+                              remove_after_read: bool = True) -> Optional[Dict[str, Any]]:
+        """ File variant of receive_message """
+        _, message_path, _ = self._paths(instance_name)
+
         start_time = time.time()
-        while time.time() - start_time < timeout:
+        while True:
+            message = None
             try:
-                # Open lock file with exclusive access
-                with open(lock_path, 'w') as lock_file:
-                    # Try to acquire an exclusive lock
+                with open(message_path, 'rb') as msg_file:
+                    size = os.fstat(msg_file.fileno()).st_size
+                    if size > _MMAP_THRESHOLD:
+                        # Parse large payloads straight out of the page
+                        # cache instead of copying them into a read buffer
+                        # first (orjson consumes the mapping directly).
+                        mm = mmap.mmap(msg_file.fileno(), size, access=mmap.ACCESS_READ)
+                        view = memoryview(mm) if _HAS_ORJSON else mm[:]
+                        try:
+                            message = _loads(view)
+                        finally:
+                            if _HAS_ORJSON:
+                                view.release()
+                            mm.close()
+                    elif size:
+                        message = _loads(msg_file.read())
+            except FileNotFoundError:
+                pass
+
+            if message is not None:
+                # Remove the message if requested
+                if remove_after_read:
                     try:
-                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
-                        
-                        # Check if message file exists
-                        if not os.path.exists(message_path):
-                            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
-                            return None
-                        
-                        # Read the message
-                        with open(message_path, 'r') as msg_file:
-                            message = json.load(msg_file)
-                        
-                        # Remove the message if requested
-                        if remove_after_read:
-                            os.remove(message_path)
-                        
-                        # Release the lock
-                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
-                        
-                        return message['payload']
-                    except IOError:
-                        # Could not acquire lock
-                        time.sleep(0.1)
-                        continue
-            except Exception:
-                time.sleep(0.1)
-        
-        return None
+                        os.remove(message_path)
+                    except FileNotFoundError:
+                        pass
+                return message['payload']
+
+            if timeout is not None and time.time() - start_time >= timeout:
+                return None
+            time.sleep(0.1)
+
+@functools.lru_cache(maxsize=None)
+def get_ipc_manager(base_dir: Optional[str] = None) -> IPCManager:
+    """
+    Get the shared process-wide IPCManager for a base directory.
+
+    Callers that repeatedly construct controllers get the same instance
+    back instead of paying for a fresh manager each time.
+
+    :param base_dir: Base directory for IPC files
+    :return: Cached IPCManager instance
+    """
+    return IPCManager(base_dir)
 
 # Demonstration function
 def demo():
     # Create an instance of IPCManager
     ipc_manager = IPCManager()
-    
+
     # Send a message
     project_name = 'test_project'
     message = {
@@ -151,14 +537,21 @@ def demo():
         'status': 'completed',
         'details': 'Data is ready for next stage'
     }
-    
+
+    # Receive in a background thread (the receiver owns the channel socket)
+    received = {}
+    def _receiver():
+        received['message'] = ipc_manager.receive_message(project_name)
+    receiver = threading.Thread(target=_receiver)
+    receiver.start()
+
     # Send the message
     send_result = ipc_manager.send_message(project_name, message)
     print(f"Message sent: {send_result}")
-    
-    # Receive the message
-    received_message = ipc_manager.receive_message(project_name)
-    print(f"Received message: {received_message}")
+
+    receiver.join()
+    print(f"Received message: {received.get('message')}")
+    ipc_manager.close()
 
 if __name__ == '__main__':
-    demo()
\ No newline at end of file
+    demo()
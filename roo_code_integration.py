@@ -1,109 +1,142 @@
 import asyncio
-import time
-from ipc_communication import IPCManager
+import logging
+from dataclasses import dataclass
+from typing import Optional
+from ipc_communication import get_ipc_manager
 # It's better to get the base dir from config or environment
 from config import IPC_BASE_DIR
 
+logger = logging.getLogger(__name__)
+
+# Prefer orjson, which serializes dataclasses directly; the stdlib
+# fallback goes through asdict first.
+try:
+    import orjson
+    _encode_notification = orjson.dumps
+except ImportError:
+    import json
+    from dataclasses import asdict
+    def _encode_notification(notification) -> bytes:
+        return json.dumps(asdict(notification)).encode()
+
+@dataclass(slots=True)
+class StepNotification:
+    """ Fixed-shape payload sent to the bot process for each step """
+    project_name: str
+    message: str
+    step_id: Optional[str] = None
+
 class RooCodeController:
     def __init__(self, project_name):
         self.project_name = project_name
         # Define distinct channel names based on project name
         self.notify_channel = f"{self.project_name}_notify"
         self.response_channel = f"{self.project_name}_response"
-        self.ipc_manager = IPCManager(base_dir=IPC_BASE_DIR)
+        self.ipc_manager = get_ipc_manager(IPC_BASE_DIR)
+        # Futures awaiting a response, keyed by step_id (None = any step)
+        self._responses = {}
+        self._subscribed = False
+
+    def _ensure_subscribed(self):
+        """ Start the response-channel listener on first use """
+        if not self._subscribed:
+            self._subscribed = True
+            self.ipc_manager.subscribe(
+                self.response_channel,
+                self._on_response,
+                loop=asyncio.get_running_loop()
+            )
+
+    def _on_response(self, response_data):
+        """ Resolve the future waiting on this response (runs on the loop) """
+        if not (isinstance(response_data, dict) and 'response' in response_data):
+            # Got a message, but not the expected format. Log it.
+            logger.warning("Received unexpected data on response channel '%s': %s", self.response_channel, response_data)
+            return
+        fut = self._responses.get(response_data.get('step_id')) or self._responses.get(None)
+        if fut is not None and not fut.done():
+            fut.set_result(response_data)
 
     async def send_step_notification(self, message, step_id=None):
         """
         Send a notification TO the bot process via the notify channel.
         """
-        notification = {
-            'project_name': self.project_name,
-            'message': message,
-            'step_id': step_id
-        }
+        notification = StepNotification(self.project_name, message, step_id)
 
-        # Send via IPC to the NOTIFY channel
-        send_result = self.ipc_manager.send_message(
+        # Queue pre-encoded bytes via IPC to the NOTIFY channel; the
+        # IPCManager splices them straight into its envelope and batches
+        # back-to-back notifications into a single write.
+        await self.ipc_manager.queue_message(
             instance_name=self.notify_channel, # Send on notify channel
-            message=notification
+            message=_encode_notification(notification)
         )
+        logger.info("Notification queued on '%s': %s", self.notify_channel, message)
 
-        if send_result:
-            print(f"Notification sent on '{self.notify_channel}': {message}")
-        else:
-            print(f"Failed to send notification on '{self.notify_channel}' (IPC lock/timeout)")
 
-
-    def wait_for_response(self, wait_timeout=600):
+    async def wait_for_response(self, step_id=None, wait_timeout=600):
         """
         Wait for a response from the Telegram bot via the RESPONSE channel.
-        Polls the IPC channel until a response is received or timeout occurs.
+        Awaits an event set by the IPC listener when a matching response
+        arrives, so delivery latency is the transport's, not a poll interval.
         """
-        print(f"Waiting for response via IPC on channel '{self.response_channel}'...")
-        start_time = time.time()
-        while time.time() - start_time < wait_timeout:
-            # Check for message on the RESPONSE channel (sent by the bot)
-            response_data = self.ipc_manager.receive_message(
-                instance_name=self.response_channel, # Receive on response channel
-                timeout=0.5,
-                remove_after_read=True # Consume the response message
-                )
-
-            if response_data:
-                # Basic check if it looks like a response payload
-                if isinstance(response_data, dict) and 'response' in response_data:
-                     print(f"Received response via IPC: {response_data}")
-                     return response_data # Return the full payload
-                else:
-                     # Got a message, but not the expected format. Log it.
-                     print(f"WARNING: Received unexpected data on response channel '{self.response_channel}': {response_data}")
-                     # Might be a leftover message, ignore and continue waiting
-
-            time.sleep(2) # Poll every 2 seconds
-
-        print(f"Timeout waiting for response on '{self.response_channel}'.")
-        return None
+        logger.info("Waiting for response via IPC on channel '%s'...", self.response_channel)
+        self._ensure_subscribed()
+        fut = asyncio.get_running_loop().create_future()
+        self._responses[step_id] = fut
+        try:
+            response_data = await asyncio.wait_for(fut, wait_timeout)
+            logger.info("Received response via IPC: %s", response_data)
+            return response_data # Return the full payload
+        except asyncio.TimeoutError:
+            logger.info("Timeout waiting for response on '%s'.", self.response_channel)
+            return None
+        finally:
+            self._responses.pop(step_id, None)
 
 # Example workflow (remains the same logic)
 async def example_roo_code_workflow():
     controller = RooCodeController('my_awesome_project')
-    print("Simulating step 1...")
+    logger.info("Simulating step 1...")
     await asyncio.sleep(2) # Shorter sleep for testing
-    print("Step 1 done. Sending notification.")
+    logger.info("Step 1 done. Sending notification.")
     await controller.send_step_notification(
         "Data preprocessing completed. Please reply with 'proceed' or 'abort'.",
         step_id="preprocessing_step"
     )
-    response = controller.wait_for_response(wait_timeout=120)
+    response = await controller.wait_for_response(wait_timeout=120)
     if response:
-        print("Processing received response:", response)
+        logger.info("Processing received response: %s", response)
         user_reply = response.get('response', '').lower()
         received_step_id = response.get('step_id')
         if received_step_id == "preprocessing_step":
             if user_reply == 'proceed':
-                print("User chose to proceed. Simulating next step...")
+                logger.info("User chose to proceed. Simulating next step...")
                 await asyncio.sleep(3)
-                print("Next step finished.")
+                logger.info("Next step finished.")
                 await controller.send_step_notification("Processing finished successfully!")
             else:
-                print("User chose to abort.")
+                logger.info("User chose to abort.")
                 await controller.send_step_notification("Processing aborted by user.")
         else:
-             print(f"Received response, but step_id '{received_step_id}' doesn't match expected 'preprocessing_step'. Ignoring response content.")
+             logger.warning("Received response, but step_id '%s' doesn't match expected 'preprocessing_step'. Ignoring response content.", received_step_id)
              # Decide how to handle mismatched step_id - maybe abort?
              await controller.send_step_notification("Received response for wrong step. Aborting.")
     else:
-        print("No response received within timeout. Aborting.")
+        logger.info("No response received within timeout. Aborting.")
         await controller.send_step_notification("Timeout waiting for user input. Aborting.")
 
 if __name__ == '__main__':
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
     # Make sure config.py sets IPC_BASE_DIR if you haven't already
     if not IPC_BASE_DIR:
-        print("Error: IPC_BASE_DIR not set in config.py")
+        logger.error("IPC_BASE_DIR not set in config.py")
         exit(1)
-    print(f"Using IPC Base Directory: {IPC_BASE_DIR}")
+    logger.info("Using IPC Base Directory: %s", IPC_BASE_DIR)
 
     try:
         asyncio.run(example_roo_code_workflow())
     except KeyboardInterrupt:
-        print("\nRoo Code workflow interrupted.")
\ No newline at end of file
+        logger.info("Roo Code workflow interrupted.")
\ No newline at end of file
@@ -4,30 +4,44 @@ import sys
 import logging
 import json
 import websockets # Added
-import inspect # For debugging handler signature
 from telegram_notification_system import RooCodeNotificationSystem
 # from ipc_communication import IPCManager # Removed
 from config import TELEGRAM_BOT_TOKEN # Removed IPC_BASE_DIR
+# Optional webhook settings; when TELEGRAM_WEBHOOK_URL is unset the bot
+# falls back to getUpdates long-polling.
+try:
+    from config import TELEGRAM_WEBHOOK_URL
+except ImportError:
+    TELEGRAM_WEBHOOK_URL = None
+try:
+    from config import TELEGRAM_WEBHOOK_PORT
+except ImportError:
+    TELEGRAM_WEBHOOK_PORT = 8443
+try:
+    from config import TELEGRAM_WEBHOOK_SECRET
+except ImportError:
+    TELEGRAM_WEBHOOK_SECRET = None
+
+# Prefer orjson for outbound frame encoding, matching ipc_communication
+try:
+    import orjson
+    _encode_frame = orjson.dumps
+except ImportError:
+    def _encode_frame(obj) -> bytes:
+        return json.dumps(obj).encode()
 
 # --- WebSocket Server Setup ---
 WEBSOCKET_HOST = "localhost"
 WEBSOCKET_PORT = 8765 # Same as in WebSocketClient.ts
 logger = logging.getLogger(__name__) # Moved logger setup earlier
 
-# Simple global state to hold the single active connection
-# In a more complex scenario, use a dictionary keyed by connection ID or similar
-active_websocket = None
+# All currently connected clients; sends fan out to every member
+active_websockets: set = set()
 notification_system = None # Global reference to the notification system instance
 
 async def websocket_handler(websocket, *args): # Changed path to *args to handle potential signature mismatch during call
     """Handles incoming WebSocket connections and messages."""
-    global active_websocket
-    if active_websocket:
-        logger.warning("New WebSocket connection attempt rejected, already connected.")
-        await websocket.close(reason="Already connected")
-        return
-
-    active_websocket = websocket
+    active_websockets.add(websocket)
     logger.info(f"WebSocket client connected from {websocket.remote_address}")
 
     try:
@@ -47,6 +61,22 @@ async def websocket_handler(websocket, *args): # Changed path to *args to handle
                         )
                     else:
                         logger.warning("Received invalid 'followup' message format.")
+                elif message.get("type") == "ipc_send":
+                    # Direct IPC over the existing socket, replacing the
+                    # spawn-a-python-script-per-message model
+                    channel = message.get("channel")
+                    if channel and notification_system:
+                        await notification_system.send_to_channel(
+                            channel, message.get("payload")
+                        )
+                    else:
+                        logger.warning("Received invalid 'ipc_send' message format.")
+                elif message.get("type") == "ipc_subscribe":
+                    channel = message.get("channel")
+                    if channel and notification_system:
+                        notification_system.subscribe_channel(channel, websocket)
+                    else:
+                        logger.warning("Received invalid 'ipc_subscribe' message format.")
                 else:
                     logger.warning(f"Received unknown WebSocket message type: {message.get('type')}")
 
@@ -63,33 +93,38 @@ async def websocket_handler(websocket, *args): # Changed path to *args to handle
         logger.error(f"Unexpected error in WebSocket handler: {e}", exc_info=True)
     finally:
         logger.info(f"WebSocket connection closed for {websocket.remote_address}")
-        if active_websocket == websocket:
-            active_websocket = None # Clear the active connection
+        if notification_system:
+            notification_system.discard_subscriber(websocket)
+        active_websockets.discard(websocket)
  
-async def send_websocket_message(message_str: str):
-    """Safely sends a message string over the active WebSocket connection."""
-    global active_websocket
-    if active_websocket:
-        try:
-            # Attempt to send the message
-            await active_websocket.send(message_str)
-            logger.debug(f"Sent WebSocket message: {message_str}")
-        except (websockets.exceptions.ConnectionClosedOK,
-                websockets.exceptions.ConnectionClosedError,
-                websockets.exceptions.ConnectionClosed) as e:
-            # Handle specific connection closed exceptions
-            logger.error(f"Failed to send WebSocket message: Connection closed ({type(e).__name__}).")
-            # Consider clearing active_websocket here if appropriate
-            # active_websocket = None
-        except Exception as e:
-            # Catch other potential errors during send
-            logger.error(f"Error sending WebSocket message: {e}", exc_info=True)
-    else:
+async def send_websocket_message(message):
+    """Safely sends a message to every connected WebSocket client.
+
+    Accepts a dict (encoded exactly once, and the resulting bytes shared by
+    every destination) or an already-encoded str/bytes frame.
+    """
+    if not active_websockets:
         # Log if there's no active connection to send to
         logger.error("Failed to send WebSocket message: No active WebSocket connection.")
+        return
+
+    buf = message if isinstance(message, (str, bytes)) else _encode_frame(message)
+
+    # Fan out concurrently so one slow/stalled client doesn't serialize
+    # delivery to the others.
+    clients = list(active_websockets)
+    results = await asyncio.gather(
+        *(ws.send(buf) for ws in clients),
+        return_exceptions=True
+    )
+    for ws, result in zip(clients, results):
+        if isinstance(result, Exception):
+            logger.error(f"Failed to send WebSocket message to {ws.remote_address}: {type(result).__name__}: {result}")
+            active_websockets.discard(ws)
+    logger.debug(f"Sent WebSocket message: {buf}")
 
 async def main():
-    global notification_system, active_websocket # Allow modification
+    global notification_system # Allow modification
     # Configure logging
     logging.basicConfig(
         level=logging.INFO,
@@ -113,20 +148,27 @@ async def main():
         )
         logger.info("Telegram Notification System initialized")
 
-        # Start the WebSocket server as a background task
-        logger.info(f"Signature of websocket_handler before serve: {inspect.signature(websocket_handler)}") # Debug signature
-        server = await websockets.serve(websocket_handler, WEBSOCKET_HOST, WEBSOCKET_PORT)
-        logger.info(f"WebSocket server started on ws://{WEBSOCKET_HOST}:{WEBSOCKET_PORT}")
-        # Keep a reference to the server task if needed for graceful shutdown, though serve() handles it
-        # server_task = asyncio.create_task(server.wait_closed())
- 
-        # Start the Telegram bot services (runs polling in background)
-        await notification_system.start_services()
-        logger.info("Telegram bot services started.")
- 
-        # Keep the main coroutine alive indefinitely
-        logger.info("WebSocket Server and Telegram Bot running. Press Ctrl+C to stop.")
-        await asyncio.Future() # This will wait forever
+        # Supervise the long-running services: the notification system's
+        # background tasks (registration writer, reply flusher, pending
+        # sweeper) are spawned into this TaskGroup, so if any of them dies
+        # the group cancels the rest and the error propagates instead of
+        # reply delivery silently wedging behind a dead task.
+        async with asyncio.TaskGroup() as tg:
+            # Start the WebSocket server as a background task
+            server = await websockets.serve(websocket_handler, WEBSOCKET_HOST, WEBSOCKET_PORT)
+            logger.info(f"WebSocket server started on ws://{WEBSOCKET_HOST}:{WEBSOCKET_PORT}")
+
+            # Start the Telegram bot services (webhook if configured, else polling)
+            await notification_system.start_services(
+                webhook_url=TELEGRAM_WEBHOOK_URL,
+                webhook_port=TELEGRAM_WEBHOOK_PORT,
+                webhook_secret=TELEGRAM_WEBHOOK_SECRET,
+                task_group=tg
+            )
+            logger.info("Telegram bot services started.")
+
+            logger.info("WebSocket Server and Telegram Bot running. Press Ctrl+C to stop.")
+            tg.create_task(server.wait_closed())
 
     except websockets.exceptions.WebSocketException as e:
          logger.error(f"WebSocket server error: {e}", exc_info=True)
@@ -136,13 +178,21 @@ async def main():
         sys.exit(1)
     except KeyboardInterrupt:
         logger.info("Shutdown requested.")
-        # Optional: Add cleanup code here if needed (e.g., close websocket gracefully)
-        if active_websocket:
-            await active_websocket.close(reason="Server shutdown")
+        # Optional: Add cleanup code here if needed (e.g., close websockets gracefully)
+        for ws in list(active_websockets):
+            await ws.close(reason="Server shutdown")
         sys.exit(0)
 
 
 if __name__ == '__main__':
+    # uvloop gives a drop-in speedup for the asyncio hot paths; it is not
+    # available on Windows, so fall back to the default loop silently.
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
     # Handle potential RuntimeErrors on Windows when stopping with Ctrl+C
     try:
         asyncio.run(main())
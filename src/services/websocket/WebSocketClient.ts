@@ -25,8 +25,15 @@ interface ReplyMessage {
   reply: string;
 }
 
+// Replies queued in the same window on the bot side arrive coalesced
+// into a single batch frame
+interface BatchMessage {
+  type: "batch";
+  items: ReplyMessage[];
+}
+
 type BotMessage = FollowupMessage; // Messages sent to bot
-type ExtensionMessage = ReplyMessage; // Messages received from bot
+type ExtensionMessage = ReplyMessage | BatchMessage; // Messages received from bot
 
 const WEBSOCKET_URL = "ws://localhost:8765"; // Default port, make configurable later
 const RECONNECT_DELAY = 5000; // 5 seconds
@@ -70,11 +77,14 @@ export class WebSocketClient extends EventEmitter<WebSocketClientEvents> {
         try {
           const message = JSON.parse(data.toString()) as ExtensionMessage;
           // Avoid logging potentially large message content directly
-          this.logger.appendLine(`[INFO] [WebSocketClient] Received message of type: ${message.type}, taskId: ${message.taskId}`); // Use appendLine, log less verbosely
-          if (message.type === "reply" && message.taskId && typeof message.reply === 'string') { // Added type check for reply
-            this.emit("replyReceived", message.taskId, message.reply);
+          this.logger.appendLine(`[INFO] [WebSocketClient] Received message of type: ${message.type}`); // Use appendLine, log less verbosely
+          if (message.type === "batch" && Array.isArray(message.items)) {
+            // Unpack coalesced replies and handle each one individually
+            for (const item of message.items) {
+              this.handleReplyMessage(item, data.toString());
+            }
           } else {
-             this.logger.appendLine(`[WARN] [WebSocketClient] Received unknown or malformed message format: ${data.toString()}`); // Use appendLine
+            this.handleReplyMessage(message as ReplyMessage, data.toString());
           }
         } catch (error) {
           this.logger.appendLine(`[ERROR] [WebSocketClient] Error parsing message: ${error instanceof Error ? error.message : String(error)} - Data: ${data.toString()}`); // Use appendLine
@@ -107,6 +117,14 @@ export class WebSocketClient extends EventEmitter<WebSocketClientEvents> {
     }
   }
 
+  private handleReplyMessage(message: ReplyMessage, rawData: string): void {
+    if (message && message.type === "reply" && message.taskId && typeof message.reply === 'string') { // Added type check for reply
+      this.emit("replyReceived", message.taskId, message.reply);
+    } else {
+      this.logger.appendLine(`[WARN] [WebSocketClient] Received unknown or malformed message format: ${rawData}`); // Use appendLine
+    }
+  }
+
   private scheduleReconnect(): void {
     // Avoid scheduling multiple reconnects
     if (!this.reconnectTimeout && this.ws === null && !this.isConnecting) {
@@ -1,9 +1,11 @@
 import os
+import functools
 import logging
 import asyncio
 import json
 import time
-from typing import Dict, Any, Optional
+from collections import defaultdict, deque
+from typing import Deque, Dict, Any, Optional
 
 import telegram
 from telegram import Update
@@ -14,10 +16,26 @@ from telegram.ext import (
     filters,
     ContextTypes
 )
+from telegram.request import HTTPXRequest
+try:
+    from telegram.ext import AIORateLimiter
+except ImportError:
+    AIORateLimiter = None
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+# Prefer orjson for registrations/reply serialization, matching the other
+# modules; fall back to compact stdlib json.
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode()
+    _loads = json.loads
+
 # Import necessary libraries
 import websockets # For exception handling
 # Removed import from run_bot to break circular dependency
@@ -28,6 +46,11 @@ from config import IPC_BASE_DIR # Import to potentially use for path
 REGISTRATION_DIR = IPC_BASE_DIR or os.path.dirname(__file__)
 REGISTRATION_FILE = os.path.join(REGISTRATION_DIR, 'registrations.json')
 
+# Pending questions that never get a reply are dropped after this many
+# seconds; the sweeper checks once per sweep interval
+PENDING_RESPONSE_TTL = 3600.0
+PENDING_SWEEP_INTERVAL = 60.0
+
 # Define the structure for the reply message payload (optional but good practice)
 from typing import TypedDict
 
@@ -35,6 +58,62 @@ class ReplyMessage(TypedDict):
     type: str
     taskId: str
     reply: str
+
+# Constant fragments of the ReplyMessage wire format. Per-reply frames are
+# spliced from these instead of allocating and serializing a fresh dict on
+# every reply; _dumps on the two strings handles JSON escaping.
+_REPLY_PREFIX = b'{"type":"reply","taskId":'
+_REPLY_MID = b',"reply":'
+
+def _encode_reply(task_id: str, reply: str) -> bytes:
+    """ Encode a ReplyMessage frame from its pre-built byte template """
+    return b''.join((_REPLY_PREFIX, _dumps(task_id), _REPLY_MID, _dumps(reply), b'}'))
+
+def _build_httpx_request(pool_size: int, read_timeout: float) -> HTTPXRequest:
+    """
+    Build a tuned httpx transport for python-telegram-bot.
+
+    Uses HTTP/2 (one multiplexed connection instead of a handshake per
+    concurrent request) when the optional h2 package is installed, and a
+    larger connection pool so bursty send_message fan-outs don't serialize
+    behind the default pool size.
+    """
+    try:
+        return HTTPXRequest(
+            connection_pool_size=pool_size,
+            http_version="2",
+            read_timeout=read_timeout,
+            connect_timeout=5.0
+        )
+    except Exception:
+        # httpx[http2]/h2 not installed; the bigger pool still helps
+        return HTTPXRequest(
+            connection_pool_size=pool_size,
+            read_timeout=read_timeout,
+            connect_timeout=5.0
+        )
+
+@functools.lru_cache(maxsize=None)
+def _build_session(max_retries: int, backoff_factor: float) -> requests.Session:
+    """
+    Build (or return the cached) retry-configured requests.Session.
+
+    Shared across RooCodeNotificationSystem instances with the same retry
+    settings so each one doesn't allocate its own connection pool and TCP
+    and TLS connections get reused.
+    """
+    session = requests.Session()
+    # Configure retries for HTTP requests (e.g., to Telegram API)
+    retry_strategy = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["HEAD", "GET", "OPTIONS", "POST"] # Include POST if needed
+    )
+    adapter = HTTPAdapter(max_retries=retry_strategy)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 class RooCodeNotificationSystem:
     def __init__(self,
                  telegram_token: str,
@@ -47,38 +126,66 @@ class RooCodeNotificationSystem:
  
         :param telegram_token: Bot API token
         :param logger: Logger instance for logging.
-        :param websocket_send_func: An async function to send a string message over the WebSocket.
+        :param websocket_send_func: An async function to send a frame (bytes or str) over the WebSocket.
         :param max_retries: Maximum number of retries for network requests
         :param backoff_factor: Backoff factor for exponential backoff
         """
         self.bot_token = telegram_token
-        self.application = Application.builder().token(self.bot_token).build()
+        builder = (
+            Application.builder()
+            .token(self.bot_token)
+            .request(_build_httpx_request(pool_size=64, read_timeout=10.0))
+            # getUpdates needs its own client with a read timeout longer
+            # than the long-poll window
+            .get_updates_request(_build_httpx_request(pool_size=8, read_timeout=35.0))
+        )
+        if AIORateLimiter is not None:
+            try:
+                # Stay just under Telegram's ~30 msg/s global limit so
+                # fan-outs can't trigger a 429/RetryAfter cascade
+                builder = builder.rate_limiter(
+                    AIORateLimiter(overall_max_rate=28, max_retries=3)
+                )
+            except RuntimeError:
+                # python-telegram-bot[rate-limiter] extra not installed
+                pass
+        self.application = builder.build()
         self.bot = self.application.bot
 
         self.logger = logger # Store logger instance
         self.websocket_send_func = websocket_send_func # Store the send function
 
-        self.session = requests.Session()
-        # Configure retries for HTTP requests (e.g., to Telegram API)
-        retry_strategy = Retry(
-            total=max_retries,
-            backoff_factor=backoff_factor,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "OPTIONS", "POST"] # Include POST if needed
-        )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        self.session.mount("https://", adapter)
-        self.session.mount("http://", adapter)
+        self.session = _build_session(max_retries, backoff_factor)
 
 
         # --- State Management ---
         # Maps taskId from VS Code to the Telegram chat_id registered for notifications
         self.registration_file = REGISTRATION_FILE
         self.task_to_chat_mapping: Dict[str, int] = {}
+        # Reverse index so error paths (e.g. a blocked chat) find the
+        # owning tasks in O(1) instead of scanning every registration
+        self.chat_to_tasks: Dict[int, set] = defaultdict(set)
         self._load_registrations() # Load existing registrations on init
-        # Stores pending questions awaiting a reply from a specific chat
-        # Maps chat_id -> {taskId} (instanceId might not be needed here)
-        self.pending_telegram_responses: Dict[int, Dict[str, str]] = {}
+        # Stores pending questions awaiting a reply from a specific chat.
+        # Maps chat_id -> deque of {taskId} entries: a chat running several
+        # tasks can have questions queued from each, answered in FIFO order
+        self.pending_telegram_responses: Dict[int, Deque[Dict[str, str]]] = defaultdict(deque)
+        # Per-chat locks serializing pending-response updates, so a reply
+        # racing a new question can't corrupt or resurrect pending state
+        self._chat_locks: Dict[int, asyncio.Lock] = {}
+        # WebSockets subscribed to IPC channels (replaces the
+        # send_ipc_message/receive_ipc_message subprocess model)
+        self.channel_subscribers: Dict[str, set] = defaultdict(set)
+        # Debounced persistence: mutations set the event, the background
+        # writer started in start_services coalesces them into one write
+        self._registrations_dirty = asyncio.Event()
+        self._registration_writer_task: Optional[asyncio.Task] = None
+        # Outbound replies are queued and coalesced into one WebSocket
+        # frame per tick by the flusher task started in start_services
+        self._out_queue: asyncio.Queue = asyncio.Queue()
+        self._reply_flusher_task: Optional[asyncio.Task] = None
+        # Periodic sweep expiring pending questions nobody answered
+        self._pending_sweeper_task: Optional[asyncio.Task] = None
         # --- End State Management ---
 
         # Logger is now passed in via __init__
@@ -86,21 +193,35 @@ class RooCodeNotificationSystem:
     # --- Registration based on Task ID ---
     def register_task_for_chat(self, task_id: str, chat_id: int):
         """ Registers a specific Roo-Code task ID to a Telegram chat ID """
+        previous_chat_id = self.task_to_chat_mapping.get(task_id)
+        if previous_chat_id is not None and previous_chat_id != chat_id:
+            self.chat_to_tasks[previous_chat_id].discard(task_id)
         self.task_to_chat_mapping[task_id] = chat_id
-        self.logger.info(f"Registered Task ID '{task_id}' to Chat ID {chat_id}")
-        self._save_registrations() # Save after registering
+        self.chat_to_tasks[chat_id].add(task_id)
+        self.logger.info("Registered Task ID '%s' to Chat ID %s", task_id, chat_id)
+        self._mark_registrations_dirty() # Save after registering
 
     def unregister_task(self, task_id: str):
         """ Removes a task ID mapping """
         if task_id in self.task_to_chat_mapping:
             removed_chat_id = self.task_to_chat_mapping.pop(task_id)
-            self.logger.info(f"Unregistered Task ID '{task_id}' from Chat ID {removed_chat_id}")
-            self._save_registrations() # Save after unregistering
-            # Also clear any pending response for this chat if the task is unregistered while waiting
-            if removed_chat_id in self.pending_telegram_responses:
-                 if self.pending_telegram_responses[removed_chat_id].get("taskId") == task_id:
-                     del self.pending_telegram_responses[removed_chat_id]
-                     self.logger.info(f"Cleared pending response for Chat ID {removed_chat_id} as Task '{task_id}' was unregistered.")
+            tasks = self.chat_to_tasks.get(removed_chat_id)
+            if tasks is not None:
+                tasks.discard(task_id)
+                if not tasks:
+                    del self.chat_to_tasks[removed_chat_id]
+            self.logger.info("Unregistered Task ID '%s' from Chat ID %s", task_id, removed_chat_id)
+            self._mark_registrations_dirty() # Save after unregistering
+            # Also clear any pending responses for this task if it is unregistered while waiting
+            pending = self.pending_telegram_responses.get(removed_chat_id)
+            if pending:
+                remaining = deque(p for p in pending if p.get("taskId") != task_id)
+                if len(remaining) != len(pending):
+                    if remaining:
+                        self.pending_telegram_responses[removed_chat_id] = remaining
+                    else:
+                        del self.pending_telegram_responses[removed_chat_id]
+                    self.logger.info("Cleared pending response(s) for Chat ID %s as Task '%s' was unregistered.", removed_chat_id, task_id)
             return True
         return False
 
@@ -108,50 +229,97 @@ class RooCodeNotificationSystem:
         """ Sends a message via Telegram """
         try:
             await self.bot.send_message(chat_id=chat_id, text=message)
-            self.logger.info(f"Telegram message sent to chat_id {chat_id}")
+            self.logger.info("Telegram message sent to chat_id %s", chat_id)
             return True
+        except telegram.error.RetryAfter as e:
+            # Flood control: honour the server-provided delay and retry once
+            self.logger.warning("Rate limited by Telegram for chat_id %s; retrying in %ss", chat_id, e.retry_after)
+            await asyncio.sleep(e.retry_after)
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=message)
+                return True
+            except Exception as retry_err:
+                self.logger.error("Failed to send Telegram message to %s after RetryAfter: %s", chat_id, retry_err)
+                return False
         except telegram.error.Forbidden as e:
-             self.logger.error(f"Failed to send Telegram message to {chat_id}: Bot blocked by user or chat not found. {e}")
+             self.logger.error("Failed to send Telegram message to %s: Bot blocked by user or chat not found. %s", chat_id, e)
              # Consider unregistering the chat/task here if the bot is blocked
              # Find task ID associated with this chat_id and call self.unregister_task()
-             task_id_to_remove = None
-             for tid, cid in self.task_to_chat_mapping.items():
-                 if cid == chat_id:
-                     task_id_to_remove = tid
-                     break
-             if task_id_to_remove:
+             for task_id_to_remove in list(self.chat_to_tasks.get(chat_id, ())):
                  self.unregister_task(task_id_to_remove)
              return False
         except Exception as e:
-            self.logger.error(f"Failed to send Telegram message to {chat_id}: {e}", exc_info=True)
+            self.logger.error("Failed to send Telegram message to %s: %s", chat_id, e, exc_info=True)
             return False
 
+    # --- IPC over WebSocket (replaces the helper-script subprocess model) ---
+    def subscribe_channel(self, channel: str, websocket):
+        """ Registers a WebSocket as a subscriber for an IPC channel """
+        self.channel_subscribers[channel].add(websocket)
+        self.logger.info("WebSocket subscribed to IPC channel '%s'", channel)
+
+    def discard_subscriber(self, websocket):
+        """ Removes a disconnected WebSocket from all channel subscriptions """
+        for subscribers in self.channel_subscribers.values():
+            subscribers.discard(websocket)
+
+    async def send_to_channel(self, channel: str, payload: Any):
+        """ Forwards an IPC payload to every WebSocket subscribed to a channel """
+        subscribers = self.channel_subscribers.get(channel)
+        if not subscribers:
+            self.logger.warning("IPC message for channel '%s' has no subscribers. Dropping.", channel)
+            return
+        message_bytes = _dumps({
+            'type': 'ipc_message',
+            'channel': channel,
+            'payload': payload
+        })
+        for subscriber in list(subscribers):
+            try:
+                await subscriber.send(message_bytes)
+            except Exception as e:
+                self.logger.warning("Dropping dead subscriber on channel '%s': %s", channel, e)
+                subscribers.discard(subscriber)
+
+    def _chat_lock(self, chat_id: int) -> asyncio.Lock:
+        """ Returns the lock guarding a chat's pending-response state """
+        return self._chat_locks.setdefault(chat_id, asyncio.Lock())
+
     # --- Process Incoming Questions from VS Code Extension (via WebSocket) ---
     async def process_incoming_websocket_notification(self, task_id: str, question: str, suggestions: Any):
         """ Processes a question received via WebSocket from the VS Code extension """
-        self.logger.info(f"Processing incoming WebSocket notification for Task ID: {task_id}")
+        self.logger.info("Processing incoming WebSocket notification for Task ID: %s", task_id)
 
         # Find the chat_id associated with this task_id
         chat_id = self.task_to_chat_mapping.get(task_id)
 
         if not chat_id:
-            self.logger.warning(f"Received notification for unregistered Task ID '{task_id}'. Ignoring.")
+            self.logger.warning("Received notification for unregistered Task ID '%s'. Ignoring.", task_id)
             # Optionally send an error back via WebSocket if the connection is still active?
             return
 
-        # Check if already waiting for a response from this chat
-        if chat_id in self.pending_telegram_responses:
-            self.logger.warning(f"Received a new question for Chat ID {chat_id} (Task: {task_id}) while already waiting for a response. Overwriting previous pending question.")
-            # Overwriting previous state
-
-        # Store pending state (mapping chat_id back to task_id)
-        self.pending_telegram_responses[chat_id] = {"taskId": task_id}
-        self.logger.info(f"Stored pending response state for Chat ID {chat_id} (Task: {task_id})")
-
-        # Format message for Telegram
-        formatted_message = f"Roo-Code Task ({task_id[:8]}...):\n\n{question}"
+        # Slice the display prefix once; it is reused in the Telegram
+        # message here and in every log/error line on the reply path
+        task_id_short = task_id[:8]
+
+        async with self._chat_lock(chat_id):
+            # Queue pending state (mapping chat_id back to task_id); replies
+            # are matched to queued questions in FIFO order
+            pending = self.pending_telegram_responses[chat_id]
+            if pending:
+                self.logger.info("Chat ID %s already has %d pending question(s); queuing Task '%s' behind them.", chat_id, len(pending), task_id_short)
+            pending.append({
+                "taskId": task_id,
+                "taskIdShort": task_id_short,
+                "queuedAt": time.monotonic()
+            })
+            self.logger.info("Stored pending response state for Chat ID %s (Task: %s)", chat_id, task_id)
+
+        # Format message for Telegram. Collect the lines and join once at
+        # the end - += in the loop rebuilds the whole string per suggestion.
+        parts = [f"Roo-Code Task ({task_id_short}...):", "", question]
         if suggestions and isinstance(suggestions, list): # Check if suggestions exist and are a list
-            formatted_message += "\n\nSuggestions:"
+            parts += ["", "Suggestions:"]
             # Assuming suggestions are strings or can be converted to strings
             for i, sug in enumerate(suggestions):
                 try:
@@ -160,14 +328,13 @@ class RooCodeNotificationSystem:
                         sug_text = sug['suggest']
                     else:
                         sug_text = str(sug)
-                    formatted_message += f"\n{i+1}. {sug_text}"
+                    parts.append(f"{i+1}. {sug_text}")
                 except Exception as e:
-                    self.logger.warning(f"Could not format suggestion {i+1}: {sug} - Error: {e}")
-                    formatted_message += f"\n{i+1}. [Error formatting suggestion]"
+                    self.logger.warning("Could not format suggestion %d: %s - Error: %s", i+1, sug, e)
+                    parts.append(f"{i+1}. [Error formatting suggestion]")
 
-            formatted_message += "\n\nPlease reply with your answer."
-        else:
-            formatted_message += "\n\nPlease reply with your answer."
+        parts += ["", "Please reply with your answer."]
+        formatted_message = "\n".join(parts)
 
         # Send the question to the user via Telegram
         await self.send_telegram_message(chat_id, formatted_message)
@@ -180,50 +347,140 @@ class RooCodeNotificationSystem:
         """
         # No longer need global active_websocket, use self.websocket_send_func
 
-        # Check if we are waiting for a response from this chat
-        pending_info = self.pending_telegram_responses.pop(chat_id, None)
-
-        if not pending_info:
-            self.logger.info(f"Received response from Chat ID {chat_id}, but no question was pending. Ignoring.")
-            # await self.send_telegram_message(chat_id, "I wasn't waiting for a response from you right now.")
-            return False
-
-        task_id = pending_info['taskId']
-        self.logger.info(f"Processing response for Task ID '{task_id}' from Chat ID {chat_id}")
+        # Hold the chat's lock across the pop/queue/put-back sequence so a
+        # concurrent question for the same chat can't interleave with it
+        async with self._chat_lock(chat_id):
+            # Check if we are waiting for a response from this chat; the
+            # oldest queued question gets the answer (FIFO)
+            pending = self.pending_telegram_responses.get(chat_id)
+
+            if not pending:
+                self.logger.info("Received response from Chat ID %s, but no question was pending. Ignoring.", chat_id)
+                # await self.send_telegram_message(chat_id, "I wasn't waiting for a response from you right now.")
+                return False
+
+            pending_info = pending.popleft()
+            if not pending:
+                del self.pending_telegram_responses[chat_id]
+            task_id = pending_info['taskId']
+            # Prefix cached when the question was queued; older persisted
+            # entries may predate it, so fall back to slicing
+            task_id_short = pending_info.get('taskIdShort') or task_id[:8]
+            self.logger.info("Processing response for Task ID '%s' from Chat ID %s", task_id, chat_id)
+
+            # Encode the response payload for the VS Code extension straight
+            # to bytes (shape documented by ReplyMessage above)
+            reply_frame = _encode_reply(task_id, response_text)
+            # Queue the reply for the coalescing flusher: replies arriving in
+            # the same window share a single WebSocket frame instead of each
+            # paying their own TCP/TLS/WS framing overhead.
+            try:
+                self._out_queue.put_nowait(reply_frame)
+                self.logger.info("WebSocket reply queued for Task ID '%s'", task_id_short)
+                return True
+            except Exception as e: # Queue is unbounded; this is belt-and-braces
+                self.logger.error("Error queuing WebSocket reply for Task ID '%s': %s", task_id_short, e, exc_info=True)
+                self.pending_telegram_responses[chat_id].appendleft(pending_info) # Put back if queuing failed
+                # Notify user about the error
+                await self.send_telegram_message(
+                    chat_id,
+                    f"Error: Could not deliver your response for Task '{task_id_short}...'. An unexpected error occurred."
+                )
+                return False
+
+    async def _reply_flusher(self):
+        """
+        Drains the outbound reply queue and sends batched frames.
 
-        # Construct the response payload for the VS Code extension
-        reply_payload: ReplyMessage = {
-            'type': 'reply',
-            'taskId': task_id,
-            'reply': response_text,
-            # 'timestamp': time.time() # Timestamp can be added if needed
-        }
-        reply_payload_str = json.dumps(reply_payload)
+        Everything queued by the time the previous frame finished sending is
+        packed into one {'type': 'batch', 'items': [...]} frame; the
+        extension side unpacks the items. Queued items are already encoded
+        frames, so the batch is spliced together byte-wise rather than
+        re-serializing the whole structure.
+        """
+        while True:
+            batch = [await self._out_queue.get()]
+            while True:
+                try:
+                    batch.append(self._out_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            frame = b'{"type":"batch","items":[' + b','.join(batch) + b']}'
+            try:
+                await self.websocket_send_func(frame)
+                self.logger.info("Sent WebSocket batch of %d reply/replies", len(batch))
+            except Exception as e:
+                self.logger.error("Error sending WebSocket reply batch: %s", e, exc_info=True)
+            for _ in batch:
+                self._out_queue.task_done()
+
+    async def _pending_sweeper(self):
+        """
+        Periodically expires pending questions that never got a reply.
 
-        # Send the response back via the provided WebSocket send function
-        try:
-            # Use the injected send function
-            await self.websocket_send_func(reply_payload_str)
-            self.logger.info(f"WebSocket reply successfully sent for Task ID '{task_id}'") # Corrected indentation
-            return True
-            # The send function itself should handle specific websocket exceptions if needed,
-            # but we catch general exceptions here.
- 
-        except Exception as e: # Catch potential errors during the send_func call
-            self.logger.error(f"Error calling websocket_send_func for Task ID '{task_id}': {e}", exc_info=True)
-            self.pending_telegram_responses[chat_id] = pending_info # Put back if send failed
-            # Notify user about the error
-            await self.send_telegram_message( # Corrected indentation
-                chat_id,
-                f"Error: Could not deliver your response for Task '{task_id[:8]}...'. An unexpected error occurred."
-            )
-            return False
+        Without a TTL an unanswered question keeps its pending entry (and
+        the chat's lock) alive for the life of the process; the sweep
+        bounds that memory and tells the user the question lapsed.
+        """
+        while True:
+            await asyncio.sleep(PENDING_SWEEP_INTERVAL)
+            now = time.monotonic()
+            for chat_id in list(self.pending_telegram_responses):
+                expired = []
+                async with self._chat_lock(chat_id):
+                    pending = self.pending_telegram_responses.get(chat_id)
+                    if not pending:
+                        continue
+                    # Entries are queued in arrival order, so expired ones
+                    # form a prefix of the deque
+                    while pending and now - pending[0].get("queuedAt", now) >= PENDING_RESPONSE_TTL:
+                        expired.append(pending.popleft())
+                    if not pending:
+                        del self.pending_telegram_responses[chat_id]
+                if not expired:
+                    continue
+                for entry in expired:
+                    self.logger.info(
+                        "Expired pending question for Task '%s' in Chat ID %s after %ds without a reply",
+                        entry.get("taskIdShort") or entry["taskId"][:8], chat_id, int(PENDING_RESPONSE_TTL)
+                    )
+                shorts = ", ".join(e.get("taskIdShort") or e["taskId"][:8] for e in expired)
+                await self.send_telegram_message(
+                    chat_id,
+                    f"The pending question(s) for Task(s) {shorts}... expired without a reply and were dropped."
+                )
+            # Locks for chats with nothing pending are recreated on demand;
+            # drop them so idle chats don't accumulate Lock objects
+            for chat_id in list(self._chat_locks):
+                if chat_id not in self.pending_telegram_responses and not self._chat_locks[chat_id].locked():
+                    del self._chat_locks[chat_id]
 
 
     # Removed _ipc_listener_task, _process_ipc_payload, _write_response_file
 
-    async def start_services(self):
-        """ Start the Telegram bot polling """
+    async def start_services(self,
+                             webhook_url: Optional[str] = None,
+                             webhook_port: int = 8443,
+                             webhook_secret: Optional[str] = None,
+                             task_group: Optional[asyncio.TaskGroup] = None):
+        """
+        Start the Telegram bot.
+
+        When webhook_url is provided, Telegram pushes updates to
+        <webhook_url>/<bot_token> instead of the bot issuing continuous
+        getUpdates long-poll requests; otherwise polling is used. Only
+        'message' updates are requested either way - the bot has no
+        handlers for anything else, so Telegram doesn't ship frames that
+        would be discarded.
+
+        :param webhook_url: Publicly reachable base URL for webhook delivery
+        :param webhook_port: Local port the webhook server listens on
+        :param webhook_secret: Optional X-Telegram-Bot-Api-Secret-Token value
+            used to authenticate incoming webhook requests
+        :param task_group: Optional TaskGroup the background writer, reply
+            flusher and pending sweeper are spawned into, so a crash in one
+            of them propagates to the caller instead of dying silently
+        """
         # Register handlers
         self.application.add_handler(CommandHandler("start", self.start_command))
         self.application.add_handler(CommandHandler("register", self.register_command))
@@ -234,11 +491,53 @@ class RooCodeNotificationSystem:
             self.handle_telegram_message_input
         ))
 
-        # Start the bot polling
+        spawn = task_group.create_task if task_group is not None else asyncio.create_task
+
+        # Start the debounced registration writer
+        if self._registration_writer_task is None:
+            self._registration_writer_task = spawn(
+                self._registration_writer()
+            )
+
+        # Start the outbound reply flusher
+        if self._reply_flusher_task is None:
+            self._reply_flusher_task = spawn(
+                self._reply_flusher()
+            )
+
+        # Start the pending-question sweeper
+        if self._pending_sweeper_task is None:
+            self._pending_sweeper_task = spawn(
+                self._pending_sweeper()
+            )
+
         await self.application.initialize()
         await self.application.start()
-        await self.application.updater.start_polling()
-        self.logger.info("Telegram bot started polling.")
+
+        if webhook_url:
+            # Push delivery: the token doubles as an unguessable URL path,
+            # and the secret token (when set) lets the server reject
+            # spoofed requests that guess the path anyway.
+            await self.application.updater.start_webhook(
+                listen="0.0.0.0",
+                port=webhook_port,
+                url_path=self.bot_token,
+                webhook_url=f"{webhook_url.rstrip('/')}/{self.bot_token}",
+                secret_token=webhook_secret,
+                allowed_updates=["message"]
+            )
+            self.logger.info("Telegram bot started in webhook mode.")
+        else:
+            # Long-poll: each getUpdates blocks server-side for up to 30s
+            # (the get_updates transport's read_timeout of 35s covers it)
+            # and the next request fires immediately, so idle traffic drops
+            # to ~2 requests/minute while delivery stays one RTT per event.
+            await self.application.updater.start_polling(
+                poll_interval=0.0,
+                timeout=30,
+                allowed_updates=["message"]
+            )
+            self.logger.info("Telegram bot started polling.")
 
         # Removed IPC listener start
 
@@ -309,8 +608,8 @@ class RooCodeNotificationSystem:
         response_text = update.message.text
 
         # Check if this chat has a pending question
-        if chat_id not in self.pending_telegram_responses:
-            self.logger.info(f"Received message from Chat ID {chat_id}, but no question was pending.")
+        if not self.pending_telegram_responses.get(chat_id):
+            self.logger.info("Received message from Chat ID %s, but no question was pending.", chat_id)
             await update.message.reply_text(
                 "Thanks for your message! I wasn't waiting for a response from you right now. "
                 "Use /register <task_id> to link a Roo-Code task."
@@ -318,56 +617,124 @@ class RooCodeNotificationSystem:
             return
 
         # Process the response text
-        self.logger.info(f"Received potential response '{response_text}' from chat {chat_id}")
-
-        success = await self.handle_telegram_response(
-            chat_id,
-            response_text
+        self.logger.info("Received potential response '%s' from chat %s", response_text, chat_id)
+
+        # Forward to the extension and acknowledge the user concurrently:
+        # the ack is optimistic, so the two round-trips overlap instead of
+        # the user waiting on the WebSocket dispatch before seeing anything.
+        success, ack_result = await asyncio.gather(
+            self.handle_telegram_response(chat_id, response_text),
+            update.message.reply_text(
+                "Your response has been sent to the Roo-Code task."
+            ),
+            return_exceptions=True
         )
-
-        if success:
+        if isinstance(ack_result, Exception):
+            self.logger.warning("Failed to send ack to Chat ID %s: %s", chat_id, ack_result)
+        if isinstance(success, Exception):
+            self.logger.error("Error processing response from Chat ID %s: %s", chat_id, success, exc_info=success)
+            success = False
+
+        # The ack already went out; if the forward failed, correct it with
+        # a follow-up (queue failures also notify from handle_telegram_response)
+        if not success:
             await update.message.reply_text(
-                f"Your response has been sent to the Roo-Code task."
+                "Correction: your response could not be delivered to the Roo-Code task."
             )
-        # Error message is handled within handle_telegram_response now
     # --- Persistence Methods ---
 
     def _load_registrations(self):
         """ Loads registered task-to-chat mappings from the JSON file """
         try:
             if os.path.exists(self.registration_file):
-                with open(self.registration_file, 'r') as f:
-                    loaded_data = json.load(f)
+                with open(self.registration_file, 'rb') as f:
+                    loaded_data = _loads(f.read())
                     # Basic validation: check if it's a dictionary
                     if isinstance(loaded_data, dict):
-                         # Ensure keys are strings and values are integers
-                         self.task_to_chat_mapping = {
-                             str(k): int(v) for k, v in loaded_data.items()
-                             if isinstance(k, str) and isinstance(v, (int, str)) and str(v).isdigit()
-                         }
-                         self.logger.info(f"Loaded {len(self.task_to_chat_mapping)} valid registrations from {self.registration_file}")
+                         # Ensure keys are strings and values are integers:
+                         # one int() attempt per entry replaces the
+                         # isinstance/str()/isdigit() check chain, and keeps
+                         # negative chat IDs (groups) that isdigit() rejected
+                         validated = {}
+                         for k, v in loaded_data.items():
+                             if not isinstance(k, str):
+                                 continue
+                             try:
+                                 validated[k] = int(v)
+                             except (TypeError, ValueError):
+                                 continue
+                         self.task_to_chat_mapping = validated
+                         self.logger.info("Loaded %d valid registrations from %s", len(self.task_to_chat_mapping), self.registration_file)
                     else:
-                         self.logger.warning(f"Data in {self.registration_file} is not a dictionary. Starting fresh.")
+                         self.logger.warning("Data in %s is not a dictionary. Starting fresh.", self.registration_file)
                          self.task_to_chat_mapping = {}
 
             else:
-                self.logger.info(f"Registration file {self.registration_file} not found. Starting fresh.")
+                self.logger.info("Registration file %s not found. Starting fresh.", self.registration_file)
                 self.task_to_chat_mapping = {}
-        except json.JSONDecodeError:
-            self.logger.error(f"Error decoding JSON from {self.registration_file}. Starting with empty registrations.", exc_info=True)
+        except ValueError:
+            # Covers both json.JSONDecodeError and orjson.JSONDecodeError
+            self.logger.error("Error decoding JSON from %s. Starting with empty registrations.", self.registration_file, exc_info=True)
             self.task_to_chat_mapping = {}
         except Exception as e:
-            self.logger.error(f"Failed to load registrations from {self.registration_file}: {e}", exc_info=True)
+            self.logger.error("Failed to load registrations from %s: %s", self.registration_file, e, exc_info=True)
             self.task_to_chat_mapping = {}
 
+        # Rebuild the reverse index to match whatever was loaded
+        self.chat_to_tasks.clear()
+        for task_id, chat_id in self.task_to_chat_mapping.items():
+            self.chat_to_tasks[chat_id].add(task_id)
+
+    async def _reload_registrations(self):
+        """
+        Re-reads the registrations file without blocking the event loop.
+
+        The initial load in __init__ stays synchronous (no loop is running
+        yet); any later reload should go through here so Telegram polling
+        and WebSocket traffic keep progressing during the disk read.
+        """
+        await asyncio.to_thread(self._load_registrations)
+
+    def _mark_registrations_dirty(self):
+        """ Request a (debounced) save of the registrations file """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop (e.g. synchronous/startup use): write directly
+            self._save_registrations()
+            return
+        self._registrations_dirty.set()
+
+    async def _registration_writer(self):
+        """
+        Coalesces bursts of registration changes into single disk writes.
+
+        Waits for the dirty flag, lets further mutations accumulate for a
+        short window, then writes once off the event loop - so N
+        registrations in a burst cost one write and the loop never blocks
+        on disk I/O.
+        """
+        while True:
+            await self._registrations_dirty.wait()
+            self._registrations_dirty.clear()
+            await asyncio.sleep(0.25) # Debounce window
+            await asyncio.to_thread(self._save_registrations)
+
     def _save_registrations(self):
         """ Saves the current task-to-chat mappings to the JSON file """
         try:
             # Ensure the directory exists
             os.makedirs(os.path.dirname(self.registration_file), exist_ok=True)
-            with open(self.registration_file, 'w') as f:
-                json.dump(self.task_to_chat_mapping, f, indent=4)
-            self.logger.debug(f"Saved {len(self.task_to_chat_mapping)} registrations to {self.registration_file}")
+            # Write compact JSON to a temp file and rename it into place:
+            # os.replace is atomic, so a crash mid-write can never leave a
+            # truncated registrations.json behind.
+            tmp_path = self.registration_file + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(_dumps(self.task_to_chat_mapping))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.registration_file)
+            self.logger.debug("Saved %d registrations to %s", len(self.task_to_chat_mapping), self.registration_file)
         except Exception as e:
-            self.logger.error(f"Failed to save registrations to {self.registration_file}: {e}", exc_info=True)
+            self.logger.error("Failed to save registrations to %s: %s", self.registration_file, e, exc_info=True)
 